@@ -1,59 +1,135 @@
 import os
 import sys
 import json
-from typing import Optional, Tuple
+import functools
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Tuple
 
-from flask import Flask, jsonify, make_response
+from flask import Flask, Response
+
+if TYPE_CHECKING:
+    import sqlalchemy.engine
+    from sqlalchemy.engine import Connection, Engine
 
-# Optional imports guarded to provide helpful errors if missing
 try:
-    from sqlalchemy import create_engine, text
-    from sqlalchemy.engine import URL
-    from sqlalchemy.exc import (
-        SQLAlchemyError,
-        NoSuchModuleError,
-        OperationalError,
-        ProgrammingError,
-        ArgumentError,
-    )
-except Exception as import_err:  # Broad on purpose to surface helpful guidance later
-    create_engine = None  # type: ignore
-    URL = None  # type: ignore
-    text = None  # type: ignore
-    SQLAlchemyError = Exception  # type: ignore
-    NoSuchModuleError = Exception  # type: ignore
-    OperationalError = Exception  # type: ignore
-    ProgrammingError = Exception  # type: ignore
-    ArgumentError = Exception  # type: ignore
-    _sqlalchemy_import_error = import_err
-else:
-    _sqlalchemy_import_error = None
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib encoder
+    orjson = None  # type: ignore
+
+# SQLAlchemy is imported on first use (see _import_sqlalchemy) so that serving "/"
+# or starting the CLI does not pay for it. Until then, and if the import fails,
+# these placeholders stand in.
+create_engine: Any = None
+URL: Any = None
+text: Any = None
+_PING_SQL: Any = None  # text("SELECT 1"), built once SQLAlchemy is imported
+SQLAlchemyError = Exception  # type: ignore
+NoSuchModuleError = Exception  # type: ignore
+OperationalError = Exception  # type: ignore
+ProgrammingError = Exception  # type: ignore
+ArgumentError = Exception  # type: ignore
+_sqlalchemy_import_error: Optional[ImportError] = None
+_sqlalchemy_imported = False
+_HAS_SA = False  # True once _import_sqlalchemy() has succeeded
+
+
+def _import_sqlalchemy() -> None:
+    """Import SQLAlchemy into the module globals once, recording any failure."""
+    global create_engine, URL, text, SQLAlchemyError, NoSuchModuleError
+    global OperationalError, ProgrammingError, ArgumentError
+    global _sqlalchemy_import_error, _sqlalchemy_imported, _HAS_SA, _PING_SQL
+    if _sqlalchemy_imported:
+        return
+    # Optional imports guarded to provide helpful errors if missing
+    try:
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.engine import URL
+        from sqlalchemy.exc import (
+            SQLAlchemyError,
+            NoSuchModuleError,
+            OperationalError,
+            ProgrammingError,
+            ArgumentError,
+        )
+    except ImportError as import_err:
+        _sqlalchemy_import_error = import_err
+    else:
+        # A single TextClause so the compiled statement is reused across probes
+        _PING_SQL = text("SELECT 1")
+        _HAS_SA = True
+    _sqlalchemy_imported = True
 
 
 app = Flask(__name__)
 
-
-def _get_env(key: str, default: Optional[str] = None) -> Optional[str]:
-    """Fetch an environment variable with fallback and strip whitespace."""
+# Engines are cached per real URL (password and query included) so requests share
+# one pool instead of building a fresh engine (and pool) on every health check.
+_engine_cache: "dict[sqlalchemy.engine.URL, Engine]" = {}
+_engine_lock = threading.Lock()
+
+# One long-lived connection reused by liveness probes in this process. A plain
+# lock (not a thread-local) guards it: under gevent workers thread-locals are
+# per-greenlet, which would leave one connection per request behind. Probes that
+# find it busy check out a pooled connection instead of waiting.
+_probe_conn: Optional["Connection"] = None
+_probe_lock = threading.Lock()
+
+# Seconds to wait for a new database connection, so a hung connect cannot stall probes
+_CONNECT_TIMEOUT = 5
+# Keep each process to at most 3 database connections (the shared probe connection
+# plus overflow for busy probes) so a burst of health checks across many gunicorn
+# workers cannot use up the server's connection slots. Probes beyond that wait up to
+# _CONNECT_TIMEOUT for a free connection and then fail.
+_POOL_SIZE = 1
+_MAX_OVERFLOW = 2
+
+_MYSQL_ALIASES = frozenset({"mysql", "mariadb"})
+
+_LOCAL_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+_DEFAULT_SOCKETS = {
+    "postgresql": "/var/run/postgresql",  # libpq takes the socket directory
+    "mysql": "/var/run/mysqld/mysqld.sock",
+}
+
+# (safe_url, body) for the last serialized /db/health success payload. The payload
+# only depends on the connection details, which the safe URL identifies, so one
+# entry tracks the single-valued config cache and is replaced when it changes.
+_ok_body: Optional[Tuple[str, bytes]] = None
+
+
+def _get_env(key: str, default: Optional[str] = None, strip: bool = True) -> Optional[str]:
+    """Fetch an environment variable with fallback, stripping whitespace unless strip=False."""
     val = os.getenv(key)
-    return (val.strip() if isinstance(val, str) else default)
+    if val is None:
+        return default
+    return val.strip() if strip else val
 
 
 def _normalize_db_type(db_type: Optional[str]) -> str:
-    if not db_type:
-        return "postgresql"
-    v = db_type.strip().lower()
-    if v in ("postgres", "postgresql", "pgsql", "psql"):
-        return "postgresql"
-    if v in ("mysql",):
-        return "mysql"
-    # Fallback to postgres if unknown
-    return "postgresql"
-
-
-def build_db_url_from_env() -> Tuple[str, dict]:
+    if db_type == "postgresql" or db_type == "mysql":
+        return db_type
+    v = (db_type or "").strip().lower()
+    # Anything that isn't a MySQL alias (including unknown values) means PostgreSQL
+    return "mysql" if v in _MYSQL_ALIASES else "postgresql"
+
+
+def _resolve_socket(setting: Optional[str], db_type: str, host: str) -> Optional[str]:
+    """Return the Unix socket path to connect through for DB_SOCKET, or None for TCP."""
+    if not setting:
+        return None
+    if setting.lower() != "auto":
+        return setting
+    path = _DEFAULT_SOCKETS[db_type]
+    if host in _LOCAL_HOSTS and os.path.exists(path):
+        return path
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def build_db_url_from_env() -> Tuple[str, Mapping, "sqlalchemy.engine.URL"]:
     """
-    Build a SQLAlchemy URL string from environment variables.
+    Build a SQLAlchemy URL from environment variables.
 
     Environment variables:
       - DB_TYPE: postgresql (default) | mysql
@@ -62,24 +138,33 @@ def build_db_url_from_env() -> Tuple[str, dict]:
       - DB_USER: database user
       - DB_PASSWORD: database password
       - DB_NAME: database name (default 'postgres' for postgres, 'mysql' for mysql)
+      - DB_SOCKET: Unix socket path, or 'auto' to use the default local socket
+        when DB_HOST is local and the socket exists (default: TCP)
+
+    Returns a tuple of (safe_url_string, details, url) where the string hides
+    the password, details is a read-only mapping and url is the real URL object
+    used to connect.
 
-    Returns a tuple of (safe_url_string, details_dict) where the URL hides password.
+    The environment is read once per process and the result is cached; call
+    build_db_url_from_env.cache_clear() to pick up changed variables.
     """
     db_type = _normalize_db_type(_get_env("DB_TYPE", "postgresql"))
     is_pg = db_type == "postgresql"
 
     host = _get_env("DB_HOST", "localhost") or "localhost"
-    port = _get_env("DB_PORT", "5432" if is_pg else "3306")
-    # Ensure port is numeric string
-    port = str(port) if port is not None else ("5432" if is_pg else "3306")
+    port_env = _get_env("DB_PORT", None)
+    port = int(port_env) if port_env else (5432 if is_pg else 3306)
     user = _get_env("DB_USER", None)
-    password = _get_env("DB_PASSWORD", None)
+    # Passwords are used verbatim; surrounding whitespace may be part of the secret
+    password = _get_env("DB_PASSWORD", None, strip=False)
     dbname = _get_env("DB_NAME", "postgres" if is_pg else "mysql")
+    socket = _resolve_socket(_get_env("DB_SOCKET", None), db_type, host)
 
     # Choose driver explicitly to ensure helpful errors when missing
     drivername = "postgresql+psycopg2" if is_pg else "mysql+pymysql"
 
-    if URL is None:  # SQLAlchemy not imported
+    _import_sqlalchemy()
+    if not _HAS_SA:
         raise RuntimeError(
             "SQLAlchemy is not installed. Please install dependencies first."
         )
@@ -89,8 +174,10 @@ def build_db_url_from_env() -> Tuple[str, dict]:
         username=user,
         password=password,
         host=host,
-        port=int(port),
+        port=port,
         database=dbname,
+        # psycopg2 reads a socket directory as "host"; PyMySQL wants "unix_socket"
+        query={("host" if is_pg else "unix_socket"): socket} if socket else {},
     )
 
     safe_url = url.render_as_string(hide_password=True)
@@ -98,112 +185,187 @@ def build_db_url_from_env() -> Tuple[str, dict]:
         "db_type": db_type,
         "driver": drivername,
         "host": host,
-        "port": int(port),
+        "port": port,
         "database": dbname,
-        "username": user,
         "url": safe_url,
     }
-    return safe_url, details
-
-
-def create_engine_from_env():
-    """Create a SQLAlchemy engine using env vars and return (engine, details)."""
-    if _sqlalchemy_import_error:
+    if socket:
+        details["socket"] = socket
+    if user:
+        # Only reported when set, so health payloads can copy details as-is
+        details["username"] = user
+    # Read-only because the result is cached and shared by every caller
+    return safe_url, MappingProxyType(details), url
+
+
+def create_engine_from_env() -> Tuple["Engine", Mapping]:
+    """Return a cached SQLAlchemy engine built from env vars as (engine, details)."""
+    _import_sqlalchemy()
+    if not _HAS_SA:
         raise RuntimeError(
             "Failed to import SQLAlchemy. Install requirements and retry."
         ) from _sqlalchemy_import_error
 
-    safe_url, details = build_db_url_from_env()
-
-    # Re-create a URL object from its string representation (password is hidden though).
-    # Instead, rebuild from the details for the real engine URL.
-    db_type = details["db_type"]
-    driver = details["driver"]
-    from sqlalchemy.engine import URL as _URL
-
-    real_url = _URL.create(
-        drivername=driver,
-        username=details["username"],
-        password=_get_env("DB_PASSWORD", None),  # real password (may be None)
-        host=details["host"],
-        port=details["port"],
-        database=details["database"],
-    )
-
-    engine = create_engine(real_url, pool_pre_ping=True, future=True)
+    safe_url, details, real_url = build_db_url_from_env()
+
+    with _engine_lock:
+        engine = _engine_cache.get(real_url)
+        if engine is None:
+            # The config is single-valued, so engines for earlier URLs are stale
+            for stale in _engine_cache.values():
+                stale.dispose()
+            _engine_cache.clear()
+            engine = create_engine(
+                real_url,
+                pool_pre_ping=True,
+                future=True,
+                pool_size=_POOL_SIZE,
+                max_overflow=_MAX_OVERFLOW,
+                pool_timeout=_CONNECT_TIMEOUT,
+                # Understood by both psycopg2 and PyMySQL
+                connect_args={"connect_timeout": _CONNECT_TIMEOUT},
+            )
+            _engine_cache[real_url] = engine
     return engine, details
 
 
+def _discard_engine(engine: "Engine") -> None:
+    """Dispose of engine and drop it from the cache so the next request rebuilds it."""
+    with _engine_lock:
+        if _engine_cache.get(engine.url) is engine:
+            del _engine_cache[engine.url]
+    engine.dispose()
+
+
+def _close_quietly(conn: "Connection") -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _probe(engine: "Engine") -> None:
+    """Run SELECT 1 on the shared probe connection, reconnecting once if it is stale.
+
+    If another request is already using the shared connection, a connection is
+    checked out from the engine's pool instead of waiting for it. No query is sent
+    on that path: pool_pre_ping verifies a reused connection on checkout, and a
+    new one proves liveness by connecting.
+    """
+    global _probe_conn
+    if not _probe_lock.acquire(blocking=False):
+        with engine.connect():
+            pass
+        return
+    try:
+        for attempt in range(2):
+            conn = _probe_conn
+            if conn is None or conn.closed or conn.invalidated or conn.engine is not engine:
+                if conn is not None:
+                    _close_quietly(conn)
+                _probe_conn = None
+                # Autocommit so the held connection never sits idle inside a transaction
+                conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+                _probe_conn = conn
+            try:
+                conn.scalar(_PING_SQL)
+                return
+            except Exception as e:
+                # Any failure may leave the connection unusable (e.g. an
+                # InterfaceError for a dropped connection), so never keep it
+                _close_quietly(conn)
+                _probe_conn = None
+                if attempt or not isinstance(e, SQLAlchemyError):
+                    raise
+    finally:
+        _probe_lock.release()
+
+
+# Error payload metadata by exception class name: (hint, include_code). Keyed by
+# name because SQLAlchemy's exception classes are only imported on first use.
+_ERR_META: dict[str, Tuple[Optional[str], bool]] = {
+    "NoSuchModuleError": (
+        "Database driver not found. Install the appropriate driver: "
+        "psycopg2-binary for PostgreSQL, or PyMySQL for MySQL.",
+        False,
+    ),
+    "ArgumentError": ("Check DB_HOST/DB_PORT/DB_NAME/DB_USER formatting.", False),
+    "OperationalError": (
+        "Verify the database is running, network access, credentials, and that the driver is installed.",
+        True,
+    ),
+}
+
+
+def _error_payload(e: BaseException, details: Optional[Mapping] = None) -> dict:
+    """Build the JSON error payload for a failed liveness check."""
+    name = type(e).__name__
+    hint, include_code = _ERR_META.get(name, (None, False))
+    orig = getattr(e, "orig", None)
+    payload: dict = {"error": name, "message": str(orig) if orig else str(e)}
+    if include_code:
+        payload["code"] = getattr(orig, "pgcode", None)
+    if details is not None:
+        payload["details"] = dict(details)
+    if hint is None and not _HAS_SA:
+        hint = "Install dependencies from requirements.txt"
+    if hint is not None:
+        payload["hint"] = hint
+    return payload
+
+
 def check_db_liveness() -> Tuple[bool, dict]:
     """Attempt a liveness query (SELECT 1). Returns (ok, payload_dict)."""
     try:
         engine, details = create_engine_from_env()
-    except NoSuchModuleError as e:
-        # Likely missing driver package
-        msg = (
-            f"Database driver not found for URL '{str(e)}'. "
-            "Install the appropriate driver: psycopg2-binary for PostgreSQL, or PyMySQL for MySQL."
-        )
-        return False, {"error": "NoSuchModuleError", "message": msg}
-    except ArgumentError as e:
-        return False, {
-            "error": "ArgumentError",
-            "message": str(e),
-            "hint": "Check DB_HOST/DB_PORT/DB_NAME/DB_USER formatting.",
-        }
     except Exception as e:
-        # Import errors or URL build errors
-        base = {
-            "error": type(e).__name__,
-            "message": str(e),
-        }
-        if _sqlalchemy_import_error is not None:
-            base["hint"] = "Install dependencies from requirements.txt"
-        return False, base
+        # Import errors, URL build errors or a missing driver
+        return False, _error_payload(e)
 
     try:
-        with engine.connect() as conn:
-            # Use a simple liveness query compatible with both PostgreSQL and MySQL
-            conn.execute(text("SELECT 1"))
-        return True, {"status": "ok", "details": {k: v for k, v in details.items() if k != "username" or v}}
-    except OperationalError as e:
-        return False, {
-            "error": "OperationalError",
-            "message": str(e.orig) if getattr(e, "orig", None) else str(e),
-            "code": getattr(getattr(e, "orig", None), "pgcode", None),
-            "details": {k: v for k, v in details.items() if k != "username" or v},
-            "hint": (
-                "Verify the database is running, network access, credentials, and that the driver is installed."
-            ),
-        }
-    except ProgrammingError as e:
-        return False, {
-            "error": "ProgrammingError",
-            "message": str(e.orig) if getattr(e, "orig", None) else str(e),
-            "details": {k: v for k, v in details.items() if k != "username" or v},
-        }
+        _probe(engine)
+        return True, {"status": "ok", "details": dict(details)}
     except SQLAlchemyError as e:
-        return False, {
-            "error": type(e).__name__,
-            "message": str(e),
-            "details": {k: v for k, v in details.items() if k != "username" or v},
-        }
+        if isinstance(e, OperationalError) or getattr(e, "connection_invalidated", False):
+            _discard_engine(engine)
+        return False, _error_payload(e, details)
+
+
+def _dumps(obj: object) -> bytes:
+    """Serialize obj to compact JSON bytes with sorted keys, like jsonify."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
 
 
 @app.route('/')
-def hello_world():
+def hello_world() -> str:
     return 'Hello, World!'
 
 
 @app.route('/db/health')
-def db_health():
+def db_health() -> Response:
+    global _ok_body
     ok, payload = check_db_liveness()
-    status_code = 200 if ok else 503
-    return make_response(jsonify(payload), status_code)
-
-
-def _print_json(d: dict):
-    print(json.dumps(d, indent=2, sort_keys=True))
+    if ok:
+        url = payload["details"]["url"]
+        cached = _ok_body
+        if cached is None or cached[0] != url:
+            cached = _ok_body = (url, _dumps(payload))
+        return Response(cached[1], status=200, mimetype="application/json")
+    return Response(_dumps(payload), status=503, mimetype="application/json")
+
+
+def _print_json(d: dict) -> None:
+    buffer = getattr(sys.stdout, "buffer", None)
+    if orjson is not None and buffer is not None:
+        # orjson emits raw UTF-8; write the bytes directly rather than decoding and
+        # re-encoding with a console codec that may not cover non-ASCII messages
+        sys.stdout.flush()
+        buffer.write(orjson.dumps(d, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b"\n")
+        buffer.flush()
+    else:
+        print(json.dumps(d, indent=2, sort_keys=True))
 
 
 def _run_cli(argv: list[str]) -> int:
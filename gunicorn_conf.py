@@ -0,0 +1,21 @@
+"""Gunicorn settings for serving the app with cooperative (gevent) workers.
+
+Usage:
+    pip install -r requirements-gunicorn.txt
+    gunicorn -c gunicorn_conf.py app:app
+"""
+import multiprocessing
+
+bind = "0.0.0.0:5000"
+worker_class = "gevent"
+workers = multiprocessing.cpu_count() * 2 + 1
+# Concurrent requests per worker; health checks mostly wait on the database.
+worker_connections = 1000
+
+
+def post_worker_init(worker):
+    # psycopg2 is a C extension, so gevent's monkey patching does not reach its
+    # sockets; install a wait callback that yields to the gevent hub instead.
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()